@@ -1,10 +1,17 @@
-import json
+import argparse
 import os
 import pathlib
+import queue
+import re
 import sys
+import threading
+import traceback
 import urllib.parse
-from typing import Any, Dict, List, Optional
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, TypeVar
 
+import ijson
+import orjson
 import psycopg
 
 try:
@@ -58,32 +65,184 @@ end $$;
 """
 
 
-UPSERT_UNIVERSITY_SQL = """
-insert into public.universities (name, country, alpha_two_code, website)
-values (%s, %s, %s, %s)
-on conflict (name, country) do update
-  set alpha_two_code = coalesce(excluded.alpha_two_code, public.universities.alpha_two_code),
-      website = coalesce(excluded.website, public.universities.website)
-returning id;
+# For a university the retry has no id for: it may still exist if another
+# writer inserted it, so the upsert and its domain insert share one statement
+# and the domains are attached to whichever id the university really has
+UPSERT_UNIVERSITY_WITH_DOMAINS_SQL = """
+with u as (
+  insert into public.universities (id, name, country, alpha_two_code, website)
+  values (%s, %s, %s, %s, %s)
+  on conflict (name, country) do update
+    set alpha_two_code = coalesce(excluded.alpha_two_code, public.universities.alpha_two_code),
+        website = coalesce(excluded.website, public.universities.website)
+  returning id
+), domains as (
+  insert into public.university_domains (domain, university_id, is_primary)
+  select d.domain, u.id, d.is_primary
+  from u, unnest(%s::text[], %s::boolean[]) as d(domain, is_primary)
+  on conflict (domain) do nothing
+)
+select id from u;
 """
 
-INSERT_DOMAIN_SQL = """
+# --clean-bulk drops the (name, country) unique constraint, so "on conflict"
+# cannot be used; ID_CACHE already knows which universities exist
+INSERT_UNIVERSITY_SQL = """
+insert into public.universities (id, name, country, alpha_two_code, website)
+values (%s, %s, %s, %s, %s);
+"""
+
+UPDATE_UNIVERSITY_SQL = """
+update public.universities
+set alpha_two_code = coalesce(%s, alpha_two_code),
+    website = coalesce(%s, website)
+where id = %s;
+"""
+
+# The row-by-row retry reuses one savepoint name for every entry
+SAVEPOINT_SQL = "savepoint sp"
+RELEASE_SAVEPOINT_SQL = "release savepoint sp"
+ROLLBACK_TO_SAVEPOINT_SQL = "rollback to savepoint sp"
+
+# Inserts all of one university's domains in a single statement. The domains
+# are passed as arrays, so the SQL text is the same whatever their number.
+# The university id is known up front, so it can be queued in the same
+# pipeline as the insert or update of the university.
+INSERT_DOMAINS_SQL = """
 insert into public.university_domains (domain, university_id, is_primary)
-values (%s, %s, %s)
+select domain, %s::uuid, is_primary
+from unnest(%s::text[], %s::boolean[]) as d(domain, is_primary)
 on conflict (domain) do nothing;
 """
 
+# Per-session staging tables that each batch is COPY'd into before being
+# merged server-side. "on commit delete rows" empties them at every commit.
+CREATE_STAGING_SQL = """
+create temp table if not exists tmp_universities (
+  id uuid not null,
+  name text not null,
+  country text null,
+  alpha_two_code text null,
+  website text null,
+  is_new boolean not null
+) on commit delete rows;
+
+create temp table if not exists tmp_domains (
+  domain text not null,
+  university_id uuid not null,
+  is_primary boolean not null
+) on commit delete rows;
+"""
+
+COPY_UNIVERSITIES_SQL = "copy tmp_universities (id, name, country, alpha_two_code, website, is_new) from stdin"
+
+COPY_DOMAINS_SQL = "copy tmp_domains (domain, university_id, is_primary) from stdin"
+
+UNIVERSITIES_EXIST_SQL = "select exists (select 1 from public.universities)"
+
+SELECT_UNIVERSITY_IDS_SQL = "select id, name, country from public.universities"
+
+# For --clean-bulk: indexes that are cheaper to build once, in a single sort,
+# after the load than to maintain row by row during it
+DROP_IMPORT_INDEXES_SQL = """
+drop index if exists public.idx_university_domains_university;
+alter table public.universities drop constraint if exists universities_name_country_key;
+"""
+
+CREATE_DOMAIN_INDEX_SQL = """
+create index if not exists idx_university_domains_university
+  on public.university_domains(university_id);
+"""
+
+# Staged universities carry client-generated ids, so nothing has to be read
+# back. If another writer inserted the same (name, country) since ID_CACHE was
+# loaded, the row is skipped here and its domains fail the foreign key check.
+# The batch then goes to the row-by-row retry, which upserts that entry with
+# its domains and so attaches them to the existing row.
+INSERT_STAGED_UNIVERSITIES_SQL = """
+insert into public.universities (id, name, country, alpha_two_code, website)
+select id, name, country, alpha_two_code, website
+from tmp_universities
+where is_new
+on conflict (name, country) do nothing;
+"""
+
+INSERT_STAGED_NEW_UNIVERSITIES_SQL = """
+insert into public.universities (id, name, country, alpha_two_code, website)
+select id, name, country, alpha_two_code, website
+from tmp_universities
+where is_new;
+"""
+
+# Only rewrite existing universities whose values actually change, instead of
+# sending every conflicting row through "on conflict do update"
+UPDATE_STAGED_UNIVERSITIES_SQL = """
+update public.universities u
+set alpha_two_code = coalesce(t.alpha_two_code, u.alpha_two_code),
+    website = coalesce(t.website, u.website)
+from tmp_universities t
+where u.id = t.id
+  and not t.is_new
+  and ((t.alpha_two_code is not null and t.alpha_two_code is distinct from u.alpha_two_code)
+    or (t.website is not null and t.website is distinct from u.website));
+"""
+
+INSERT_STAGED_DOMAINS_SQL = """
+insert into public.university_domains (domain, university_id, is_primary)
+select domain, university_id, is_primary
+from tmp_domains
+on conflict (domain) do nothing;
+"""
+
+_PROTOCOL_RE = re.compile(r"^https?://")
+
+_uuid7 = getattr(uuid, "uuid7", None)
+
+# Entries per staged batch (and per transaction).
+BATCH_SIZE = 1000
+
+# Input files up to this size are parsed whole; larger ones are streamed.
+STREAM_THRESHOLD_BYTES = 64 * 1024 * 1024
+
+# Normalized batches the reader thread may hold ready while one is being written.
+PREFETCH_BATCHES = 2
+
+# Skipped entries whose errors are printed in full; --verbose prints all of them.
+# On dirty data, thousands of tracebacks would otherwise dominate the runtime.
+MAX_REPORTED_ERRORS = 10
+VERBOSE = False
+_errors_reported = 0
+# errors are reported from both the reader thread and the main thread
+_errors_lock = threading.Lock()
+
+_DONE = object()
+
+T = TypeVar("T")
+
+# (name, country, alpha_two_code, website, domains)
+UniversityRow = Tuple[str, Optional[str], Optional[str], Optional[str], List[str]]
+# (name, country, alpha_two_code, website)
+StagedUniversity = Tuple[str, Optional[str], Optional[str], Optional[str]]
+# (name, country, domain, is_primary)
+StagedDomain = Tuple[str, Optional[str], str, bool]
+
+# What has already been committed during this run, so duplicates later in the
+# file are dropped client-side instead of costing another round of upserts.
+# (name, country) -> (alpha_two_code, website)
+_SEEN_UNIVERSITIES: Dict[Tuple[str, Optional[str]], Tuple[Optional[str], Optional[str]]] = {}
+_SEEN_DOMAINS: Set[str] = set()
+
+# (name, country) -> university id, loaded once up front and extended with
+# every committed insert, so domain rows can carry their university_id
+# without a RETURNING round-trip
+ID_CACHE: Dict[Tuple[str, Optional[str]], Any] = {}
+
 
 def normalize_domain(d: str) -> str:
-    d = (d or "").strip().lower()
-    # remove trailing slash or protocol if present in dataset variants
-    d = d.replace("http://", "").replace("https://", "")
-    d = d.strip("/")
-    # PostgreSQL text can be very long, but domains should be reasonable
-    # Truncate if absurdly long (max 253 chars per RFC, but allow some buffer)
-    if len(d) > 255:
-        d = d[:255]
-    return d
+    # remove trailing slash or protocol if present in dataset variants.
+    # PostgreSQL text can be very long, but domains should be reasonable:
+    # truncate if absurdly long (max 253 chars per RFC, but allow some buffer)
+    return _PROTOCOL_RE.sub("", (d or "").strip().lower(), count=1).strip("/")[:255]
 
 
 def normalize_website(url: Optional[str]) -> Optional[str]:
@@ -93,20 +252,347 @@ def normalize_website(url: Optional[str]) -> Optional[str]:
     return url or None
 
 
-def load_json(path: str) -> List[Dict[str, Any]]:
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    if not isinstance(data, list):
+def report_error(label: str, error: Exception, entry: Any) -> None:
+    """Print a skipped entry's error, with its traceback, for the first few errors only."""
+    global _errors_reported
+    with _errors_lock:
+        _errors_reported += 1
+        if not VERBOSE and _errors_reported > MAX_REPORTED_ERRORS:
+            if _errors_reported == MAX_REPORTED_ERRORS + 1:
+                print(f"\nMore than {MAX_REPORTED_ERRORS} entries failed; not printing further errors (use --verbose).")
+            return
+
+        print(f"\n[{label}] Skipping entry due to error ({type(error).__name__}): {error}")
+        print(f"Entry: {entry}")
+        # Print full traceback for debugging
+        traceback.print_exc()
+
+
+def normalize_entry(entry: Dict[str, Any]) -> Optional[UniversityRow]:
+    name = (entry.get("name") or "").strip()
+    if not name:
+        return None
+
+    country = entry.get("country")
+    alpha_two_code = entry.get("alpha_two_code")
+    web_pages = entry.get("web_pages")
+    domains = entry.get("domains")
+
+    return (
+        name,
+        country.strip() if isinstance(country, str) else None,
+        alpha_two_code.strip() if isinstance(alpha_two_code, str) else None,
+        normalize_website(web_pages[0] if isinstance(web_pages, list) and web_pages else None),
+        [normalize_domain(d if type(d) is str else str(d)) for d in domains] if isinstance(domains, list) else [],
+    )
+
+
+def new_university_id() -> uuid.UUID:
+    # uuid7 (Python 3.14+) is time-ordered, which keeps primary key inserts
+    # local in the index; older Pythons fall back to random ids
+    return _uuid7() if _uuid7 else uuid.uuid4()
+
+
+def dedupe_batch(
+    batch: List[UniversityRow],
+) -> Tuple[List[StagedUniversity], List[StagedDomain], Dict[Tuple[str, Optional[str]], Any]]:
+    """Merge duplicate universities and drop domains that were already sent.
+
+    Also assigns ids to universities that are not in ID_CACHE yet and returns
+    them; the caller adds them to the cache once the batch has committed.
+    """
+    # Later entries win, like they did when every entry was upserted on its
+    # own, but a missing alpha_two_code / website never erases a known one.
+    unis: Dict[Tuple[str, Optional[str]], StagedUniversity] = {}
+    for name, country, alpha_two_code, website, _ in batch:
+        key = (name, country)
+        prev = unis.get(key)
+        if prev:
+            alpha_two_code = alpha_two_code or prev[2]
+            website = website or prev[3]
+        else:
+            seen = _SEEN_UNIVERSITIES.get(key)
+            if seen:
+                alpha_two_code = alpha_two_code or seen[0]
+                website = website or seen[1]
+        unis[key] = (name, country, alpha_two_code, website)
+
+    uni_rows = [row for key, row in unis.items() if _SEEN_UNIVERSITIES.get(key) != row[2:]]
+    new_ids = {key: new_university_id() for key in unis if key not in ID_CACHE}
+
+    # mark first domain as primary if present; the first university to
+    # claim a domain keeps it, so later duplicates are dropped here
+    domain_rows: List[StagedDomain] = []
+    batch_domains: Set[str] = set()
+    for name, country, _, _, domains in batch:
+        for i, dom in enumerate(domains):
+            if dom and dom not in batch_domains and dom not in _SEEN_DOMAINS:
+                batch_domains.add(dom)
+                domain_rows.append((name, country, dom, i == 0))
+
+    return uni_rows, domain_rows, new_ids
+
+
+def remember_batch(
+    uni_rows: List[StagedUniversity],
+    domain_rows: List[StagedDomain],
+    new_ids: Dict[Tuple[str, Optional[str]], Any],
+) -> None:
+    for name, country, alpha_two_code, website in uni_rows:
+        _SEEN_UNIVERSITIES[(name, country)] = (alpha_two_code, website)
+    _SEEN_DOMAINS.update(row[2] for row in domain_rows)
+    ID_CACHE.update(new_ids)
+
+
+def load_id_cache(cur: psycopg.Cursor) -> None:
+    cur.execute(SELECT_UNIVERSITY_IDS_SQL)
+    for uni_id, name, country in cur:
+        ID_CACHE[(name, country)] = uni_id
+
+
+def flush_batch(
+    cur: psycopg.Cursor,
+    uni_rows: List[StagedUniversity],
+    domain_rows: List[StagedDomain],
+    new_ids: Dict[Tuple[str, Optional[str]], Any],
+    bulk: bool = False,
+) -> None:
+    """COPY deduplicated rows into the staging tables and merge them.
+
+    Every university id is known before anything is sent, so both COPY
+    streams go out back to back and no statement result is read.
+    """
+    with cur.copy(COPY_UNIVERSITIES_SQL) as copy:
+        for row in uni_rows:
+            key = (row[0], row[1])
+            new_id = new_ids.get(key)
+            copy.write_row((new_id or ID_CACHE[key], *row, new_id is not None))
+    with cur.copy(COPY_DOMAINS_SQL) as copy:
+        for name, country, domain, is_primary in domain_rows:
+            key = (name, country)
+            copy.write_row((domain, new_ids.get(key) or ID_CACHE[key], is_primary))
+
+    # The merge statements are prepared server-side on first use rather than
+    # after psycopg's default five executions, so clean batches skip parse/plan.
+    # Any rollback makes psycopg drop its prepared statements, so they are
+    # prepared again after a failed batch.
+    cur.execute(INSERT_STAGED_NEW_UNIVERSITIES_SQL if bulk else INSERT_STAGED_UNIVERSITIES_SQL, prepare=True)
+    # The update only touches rows that already exist, so it is skipped when
+    # every staged university is new (the usual case in a clean import)
+    if any((row[0], row[1]) not in new_ids for row in uni_rows):
+        cur.execute(UPDATE_STAGED_UNIVERSITIES_SQL, prepare=True)
+    cur.execute(INSERT_STAGED_DOMAINS_SQL, prepare=True)
+
+
+def retry_rows(
+    cur: psycopg.Cursor,
+    batch: List[UniversityRow],
+    bulk: bool = False,
+) -> Tuple[int, int, int, Dict[Tuple[str, Optional[str]], Any]]:
+    """Insert a failed batch one row at a time.
+
+    Returns (universities, domains, skipped, ids); the caller adds the ids to
+    ID_CACHE once the batch has committed.
+    """
+    inserted_unis = 0
+    inserted_domains = 0
+    skipped = 0
+    retried_ids: Dict[Tuple[str, Optional[str]], Any] = {}
+
+    conn = cur.connection
+    with conn.cursor() as uni_cur:
+        for idx, (name, country, alpha_two_code, website, domains) in enumerate(batch, 1):
+            key = (name, country)
+            uni_id = retried_ids.get(key) or ID_CACHE.get(key)
+            # mark first domain as primary if present
+            entry_domains = [(dom, i == 0) for i, dom in enumerate(domains) if dom]
+            domain_names = [d[0] for d in entry_domains]
+            domain_primary = [d[1] for d in entry_domains]
+            # Use savepoint for each entry so failures don't rollback the rest of the batch.
+            # The whole entry is queued in one pipeline: a single round-trip, with
+            # any error raised when the pipeline syncs on exit.
+            try:
+                with conn.pipeline():
+                    cur.execute(SAVEPOINT_SQL)
+
+                    if uni_id is None and not bulk:
+                        # its id is read once the pipeline has synced
+                        uni_cur.execute(
+                            UPSERT_UNIVERSITY_WITH_DOMAINS_SQL,
+                            (new_university_id(), name, country, alpha_two_code, website, domain_names, domain_primary),
+                        )
+                    else:
+                        if uni_id is None:
+                            # --clean-bulk: not in the cache means not in the table
+                            uni_id = new_university_id()
+                            cur.execute(INSERT_UNIVERSITY_SQL, (uni_id, name, country, alpha_two_code, website))
+                        else:
+                            cur.execute(UPDATE_UNIVERSITY_SQL, (alpha_two_code, website, uni_id))
+                        if entry_domains:
+                            cur.execute(INSERT_DOMAINS_SQL, (uni_id, domain_names, domain_primary))
+
+                    # Release savepoint on success
+                    cur.execute(RELEASE_SAVEPOINT_SQL)
+
+                if uni_id is None:
+                    uni_id = uni_cur.fetchone()[0]
+                retried_ids[key] = uni_id
+                inserted_unis += 1
+                inserted_domains += len(entry_domains)
+
+            except Exception as e:
+                # Rollback to savepoint to undo just this entry
+                skipped += 1
+                try:
+                    # ROLLBACK TO keeps the savepoint, so release it before the next entry reuses the name
+                    cur.execute(ROLLBACK_TO_SAVEPOINT_SQL)
+                    cur.execute(RELEASE_SAVEPOINT_SQL)
+                except Exception:
+                    pass  # Savepoint might not exist if error happened early
+
+                report_error(f"Retry {idx}/{len(batch)}", e, f"{name} ({country})")
+
+    return inserted_unis, inserted_domains, skipped, retried_ids
+
+
+def import_batch(
+    conn: psycopg.Connection,
+    cur: psycopg.Cursor,
+    batch: List[UniversityRow],
+    bulk: bool = False,
+) -> Tuple[int, int, int]:
+    """Import a batch in one transaction, retrying row by row if it fails."""
+    uni_rows, domain_rows, new_ids = dedupe_batch(batch)
+    try:
+        flush_batch(cur, uni_rows, domain_rows, new_ids, bulk)
+        conn.commit()
+        remember_batch(uni_rows, domain_rows, new_ids)
+        return len(batch), len(domain_rows), 0
+    except Exception as e:
+        conn.rollback()
+        print(f"\nBatch failed ({type(e).__name__}: {e}); retrying {len(batch)} entries one at a time...")
+
+    inserted_unis, inserted_domains, skipped, retried_ids = retry_rows(cur, batch, bulk)
+    conn.commit()
+    ID_CACHE.update(retried_ids)
+    return inserted_unis, inserted_domains, skipped
+
+
+def iter_entries(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield the objects of the top-level JSON array.
+
+    Files up to STREAM_THRESHOLD_BYTES are parsed in one go with orjson, which
+    is faster than ijson; larger ones are streamed so memory stays bounded.
+    """
+    if os.path.getsize(path) <= STREAM_THRESHOLD_BYTES:
+        data = orjson.loads(pathlib.Path(path).read_bytes())
+        if not isinstance(data, list):
+            raise ValueError("Expected a JSON array of university objects.")
+        yield from data
+        return
+
+    found = False
+    with open(path, "rb") as f:
+        for entry in ijson.items(f, "item"):
+            found = True
+            yield entry
+    if not found:
         raise ValueError("Expected a JSON array of university objects.")
-    return data
 
 
-def main() -> None:
-    if len(sys.argv) < 2:
-        print("Usage: python import_universities.py <path_to_university_json>")
-        sys.exit(1)
+def normalize_batch(entries: List[Dict[str, Any]], start: int = 1) -> Tuple[List[UniversityRow], int]:
+    """Normalize a batch of raw entries; returns (rows, skipped)."""
+    rows: Optional[List[Optional[UniversityRow]]]
+    try:
+        rows = [normalize_entry(entry) for entry in entries]
+    except Exception:
+        rows = None
+
+    if rows is None:
+        # Fall back to one entry at a time so only the bad entries are skipped
+        # (outside the except block, so tracebacks are not chained to the batch error)
+        rows = []
+        for idx, entry in enumerate(entries, start):
+            try:
+                rows.append(normalize_entry(entry))
+            except Exception as e:
+                rows.append(None)
+                report_error(f"Entry {idx}", e, entry)
+
+    kept = [row for row in rows if row is not None]
+    return kept, len(entries) - len(kept)
+
+
+def read_batches(path: str) -> Iterator[Tuple[List[UniversityRow], int]]:
+    """Yield (batch, skipped) pairs of normalized entries.
+
+    A batch closes after BATCH_SIZE raw entries, skipped ones included, so
+    batches stay bounded no matter how many entries are bad.
+    """
+    entries: List[Any] = []
+    start = 1
+    for entry in iter_entries(path):
+        entries.append(entry)
+        if len(entries) >= BATCH_SIZE:
+            yield normalize_batch(entries, start)
+            start += len(entries)
+            entries = []
+
+    if entries:
+        yield normalize_batch(entries, start)
+
+
+def prefetch(items: Iterator[T], depth: int) -> Iterator[T]:
+    """Drive an iterator on a background thread, staying up to `depth` items ahead."""
+    buffer: "queue.Queue[Tuple[Any, Optional[BaseException]]]" = queue.Queue(maxsize=depth)
+
+    def worker() -> None:
+        try:
+            for item in items:
+                buffer.put((item, None))
+        except BaseException as e:
+            buffer.put((None, e))
+            return
+        buffer.put((_DONE, None))
+
+    threading.Thread(target=worker, daemon=True).start()
+    while True:
+        item, error = buffer.get()
+        if error is not None:
+            raise error
+        if item is _DONE:
+            return
+        yield item
+
+
+def rebuild_indexes(conn: psycopg.Connection, cur: psycopg.Cursor) -> None:
+    """Restore what --clean-bulk dropped for the load."""
+    print("Rebuilding indexes...")
+    cur.execute(ENSURE_CONSTRAINT_SQL)
+    cur.execute(CREATE_DOMAIN_INDEX_SQL)
+    conn.commit()
+
 
-    json_path = sys.argv[1]
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import universities and their email domains.", allow_abbrev=False)
+    parser.add_argument("json_path", help="path to the university JSON file")
+    parser.add_argument(
+        "--clean-bulk",
+        action="store_true",
+        help="the universities table is empty; drop the (name, country) unique constraint "
+        "and the domain index during the load and rebuild them at the end",
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help=f"print every skipped entry's error instead of only the first {MAX_REPORTED_ERRORS}",
+    )
+    args = parser.parse_args()
+
+    global VERBOSE
+    VERBOSE = args.verbose
+
+    json_path = args.json_path
     # Check for DATABASE_URL first (common convention), then SUPABASE_DB_URL for backwards compatibility
     db_url = os.environ.get("DATABASE_URL") or os.environ.get("SUPABASE_DB_URL")
 
@@ -127,15 +613,10 @@ def main() -> None:
     except Exception:
         pass
 
-    data = load_json(json_path)
-
     inserted_unis = 0
     inserted_domains = 0
     skipped = 0
 
-    print("Loading data...")
-    print(f"Total entries to process: {len(data)}")
-    
     with psycopg.connect(db_url, connect_timeout=30) as conn:
         print("Connected. Setting up database...")
         conn.execute("set statement_timeout = '0'")  # allow long import
@@ -144,84 +625,48 @@ def main() -> None:
             cur.execute(CREATE_TABLES_SQL)
             # Ensure the unique constraint exists (in case table was created without it)
             cur.execute(ENSURE_CONSTRAINT_SQL)
+            cur.execute(CREATE_STAGING_SQL)
+            if args.clean_bulk:
+                # only drop the constraint on a table no one is using yet
+                cur.execute(UNIVERSITIES_EXIST_SQL)
+                if cur.fetchone()[0]:
+                    print("ERROR: --clean-bulk was given but public.universities already has rows.")
+                    sys.exit(1)
+                cur.execute(DROP_IMPORT_INDEXES_SQL)
+            else:
+                load_id_cache(cur)
             conn.commit()
             print("Database setup complete. Starting import...")
 
-            for idx, entry in enumerate(data, 1):
-                # Use savepoint for each entry so failures don't rollback previous work
-                savepoint_name = f"sp_entry_{idx}"
-                try:
-                    cur.execute(f"SAVEPOINT {savepoint_name}")
-                    
-                    name = (entry.get("name") or "").strip()
-                    if not name:
-                        skipped += 1
-                        cur.execute(f"RELEASE SAVEPOINT {savepoint_name}")
+            try:
+                # batches are parsed and normalized on a background thread, so the
+                # next one is ready as soon as the database finishes the current one
+                for batch, failed in prefetch(read_batches(json_path), PREFETCH_BATCHES):
+                    skipped += failed
+                    if not batch:
                         continue
-
-                    country = entry.get("country")
-                    country = country.strip() if isinstance(country, str) else None
-
-                    alpha_two_code = entry.get("alpha_two_code")
-                    alpha_two_code = alpha_two_code.strip() if isinstance(alpha_two_code, str) else None
-
-                    web_pages = entry.get("web_pages") or []
-                    website = normalize_website(web_pages[0] if isinstance(web_pages, list) and web_pages else None)
-
-                    # upsert university and get id
-                    cur.execute(UPSERT_UNIVERSITY_SQL, (name, country, alpha_two_code, website))
-                    result = cur.fetchone()
-                    if not result:
-                        raise ValueError("Failed to get university ID from upsert")
-                    uni_id = result[0]
-                    inserted_unis += 1
-
-                    domains = entry.get("domains") or []
-                    if not isinstance(domains, list):
-                        domains = []
-
-                    # mark first domain as primary if present
-                    for i, d in enumerate(domains):
-                        dom = normalize_domain(str(d))
-                        if not dom:
-                            continue
-                        # Validate uni_id is valid UUID
-                        if not uni_id:
-                            raise ValueError(f"Invalid university_id: {uni_id}")
-                        try:
-                            cur.execute(INSERT_DOMAIN_SQL, (dom, uni_id, i == 0))
-                            inserted_domains += 1
-                        except Exception as domain_err:
-                            # Log domain-specific errors but continue
-                            print(f"  Warning: Failed to insert domain '{dom}': {domain_err}")
-                            # Don't skip the whole entry, just this domain
-                            continue
-
-                    # Release savepoint on success
-                    cur.execute(f"RELEASE SAVEPOINT {savepoint_name}")
-
-                except Exception as e:
-                    # Rollback to savepoint to undo just this entry
-                    skipped += 1
-                    try:
-                        cur.execute(f"ROLLBACK TO SAVEPOINT {savepoint_name}")
-                    except Exception:
-                        pass  # Savepoint might not exist if error happened early
-                    
-                    import traceback
-                    error_msg = str(e)
-                    error_type = type(e).__name__
-                    print(f"\n[Entry {idx}/{len(data)}] Skipping entry due to error ({error_type}): {error_msg}")
-                    print(f"Entry: {entry}")
-                    # Print full traceback for debugging
-                    traceback.print_exc()
-                
-                # commit in chunks to avoid huge transactions
-                if (inserted_unis % 500) == 0:
-                    conn.commit()
+                    # one transaction per batch keeps transactions bounded
+                    unis, domains, failed = import_batch(conn, cur, batch, args.clean_bulk)
+                    inserted_unis += unis
+                    inserted_domains += domains
+                    skipped += failed
                     print(f"Progress: {inserted_unis} universities, {inserted_domains} domains processed...")
-
-            conn.commit()
+            except BaseException:
+                if args.clean_bulk:
+                    # also on errors and Ctrl-C, so the table is not left without
+                    # its unique constraint. If the connection is what failed this
+                    # cannot work either; the original error is still raised.
+                    try:
+                        conn.rollback()
+                        rebuild_indexes(conn, cur)
+                    except Exception as e:
+                        print(f"\nCould not rebuild indexes ({type(e).__name__}: {e}).")
+                        print("The (name, country) unique constraint and the domain index are still dropped;")
+                        print("rerun the import without --clean-bulk to restore them.")
+                raise
+
+            if args.clean_bulk:
+                rebuild_indexes(conn, cur)
 
     print("Done.")
     print(f"Universities processed (upsert attempts): {inserted_unis}")